@@ -16,6 +16,10 @@ as a bitmask.
 
 import os
 import csv
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import numpy as np
 from PIL import Image
 import struct
 
@@ -39,240 +43,182 @@ VGA_PALETTE = [
     (255, 255, 255),  # 15: White
 ]
 
-def signed_to_unsigned_16(val):
-    """Convert signed 16-bit int to unsigned"""
-    if val < 0:
-        return val + 65536
-    return val
+# Palette as a (16, 3) lookup table for indexing whole pixel arrays
+PALETTE = np.array(VGA_PALETTE, dtype=np.uint8)
 
-def extract_bits(value, num_bits=16):
-    """Extract individual bits from a 16-bit value, MSB first, then swap halves"""
-    bits = []
-    for i in range(num_bits - 1, -1, -1):
-        bits.append((value >> i) & 1)
-    # Swap left and right halves (bits 0-7 and 8-15)
-    return bits[8:16] + bits[0:8]
+# The 8 pixels encoded by one plane byte (MSB first), precomputed for each
+# plane and byte value. Entry [plane][byte] holds one pixel per byte of a
+# little-endian uint64, with the plane's bit already shifted into place.
+BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1)
+PLANE_BYTE_PIXELS = (
+    BYTE_BITS << np.arange(4, dtype=np.uint8)[:, None, None]
+).view('<u8').reshape(4, 256)
+
+def planes_to_pixels(planes):
+    """
+    Convert a (..., 4) uint16 array of plane words to (..., 16) color indices.
+    
+    Leading dimensions are kept, so a single row, a whole sprite or a stack
+    of same-sized sprites can be decoded in one call.
+    """
+    planes = np.asarray(planes, dtype='<u2')
+    
+    # Swapping the left and right halves (bits 0-7 and 8-15) of a word is a
+    # byte swap, so the little-endian bytes of each word are in pixel order
+    plane_bytes = planes.view(np.uint8).reshape(planes.shape + (2,))
+    
+    # Look up the 8 pixels of every plane byte and combine planes to get
+    # pixel colors, 8 at a time
+    color = (
+        PLANE_BYTE_PIXELS[0][plane_bytes[..., 0, :]] |
+        PLANE_BYTE_PIXELS[1][plane_bytes[..., 1, :]] |
+        PLANE_BYTE_PIXELS[2][plane_bytes[..., 2, :]] |
+        PLANE_BYTE_PIXELS[3][plane_bytes[..., 3, :]]
+    )
+    
+    color = color.astype('<u8', copy=False).view(np.uint8)
+    return color.reshape(planes.shape[:-1] + (16,))
 
 def parse_sprite_data(data_values, width, height):
     """
     Parse planar VGA sprite data into a 2D pixel array.
     
     VGA Mode 12 uses 4 bit planes. Each row of 16 pixels is stored as
-    4 consecutive 16-bit integers (one per plane).
+    4 consecutive 16-bit integers (one per plane), given here as the uint16
+    array built by parse_lbr_file. The planes are decoded for all rows at
+    once and returned as a (height, width) uint8 array.
     """
-    pixels = []
+    # Only complete rows of 4 plane values are usable
+    rows = min(height, len(data_values) // 4)
+    for row in range(rows, height):
+        print(f"Warning: Not enough data at row {row}, padding with zeros")
     
-    # Calculate values per row (width / 16 bits * 4 planes)
-    words_per_row = (width // 16) * 4
-    if width % 16 != 0:
-        words_per_row = 4  # For 16-pixel wide sprites
+    planes = np.zeros((height, 4), dtype=np.uint16)
+    planes[:rows] = np.asarray(data_values[:rows * 4]).reshape(rows, 4)
     
-    data_idx = 0
+    color = planes_to_pixels(planes)
     
-    for row in range(height):
-        row_pixels = []
-        
-        # Get the 4 plane values for this row
-        if data_idx + 4 > len(data_values):
-            print(f"Warning: Not enough data at row {row}, padding with zeros")
-            plane_values = [0, 0, 0, 0]
-        else:
-            plane_values = []
-            for p in range(4):
-                val = int(data_values[data_idx + p])
-                plane_values.append(signed_to_unsigned_16(val))
-        
-        data_idx += 4
-        
-        # Extract bits from each plane
-        plane_bits = [extract_bits(pv) for pv in plane_values]
-        
-        # Combine planes to get pixel colors
-        for x in range(width):
-            if x < 16:
-                color = (
-                    (plane_bits[0][x] << 0) |
-                    (plane_bits[1][x] << 1) |
-                    (plane_bits[2][x] << 2) |
-                    (plane_bits[3][x] << 3)
-                )
-            else:
-                color = 0
-            row_pixels.append(color)
-        
-        pixels.append(row_pixels)
+    if width == 16:
+        return color
     
+    # Only the first 16 pixels of a row are encoded; the rest stay 0
+    visible = min(width, 16)
+    pixels = np.zeros((height, width), dtype=np.uint8)
+    pixels[:, :visible] = color[:, :visible]
     return pixels
 
-def create_sprite_image(pixels, scale=4):
-    """Create a PIL Image from pixel data with optional scaling"""
-    height = len(pixels)
-    width = len(pixels[0]) if pixels else 0
-    
-    img = Image.new('RGB', (width * scale, height * scale))
-    
-    for y, row in enumerate(pixels):
-        for x, color_idx in enumerate(row):
-            rgb = VGA_PALETTE[color_idx % 16]
-            # Draw scaled pixel
-            for sy in range(scale):
-                for sx in range(scale):
-                    img.putpixel((x * scale + sx, y * scale + sy), rgb)
-    
-    return img
+def upscale_rgb(rgb, scale):
+    """Scale each pixel of an RGB array up to a scale x scale block"""
+    if scale == 1:
+        return rgb
+    return rgb.repeat(scale, axis=0).repeat(scale, axis=1)
+
+def sprite_to_rgb(pixels):
+    """Convert pixel data to a (height, width, 3) RGB array"""
+    # Pixels come from 4 combined planes, so they are always valid 0-15 indices
+    return PALETTE[pixels]
+
+def split_lbr_line(line):
+    """Split one line of an LBR file into fields, removing quotes"""
+    return next(csv.reader([line], skipinitialspace=True))
 
 def parse_lbr_file(filepath):
     """Parse the MINERVGA.LBR file and return sprite data"""
     sprites = []
     
-    with open(filepath, 'r') as f:
-        content = f.read()
-    
-    # Parse as CSV-like format
-    lines = content.strip().split('\n')
-    
-    # Parse header
-    header_parts = lines[0].split(',')
-    library_name = header_parts[0].strip('"')
-    sprite_count = int(header_parts[1])
-    
-    print(f"Library: {library_name}")
-    print(f"Sprite count: {sprite_count}")
-    print()
-    
-    # Parse each sprite
-    for line_num, line in enumerate(lines[1:], start=2):
-        if not line.strip():
-            continue
-            
-        # Parse the CSV-like line
-        # Format: index,"name",width,height,data...
-        parts = []
-        in_quotes = False
-        current = ""
+    with open(filepath, 'r', newline='') as f:
+        # Format: "LibraryName",sprite_count then index,"name",width,height,data...
+        # Each line is split on its own, so a stray quote only spoils its line
+        lines = enumerate(f, start=1)
         
-        for char in line:
-            if char == '"':
-                in_quotes = not in_quotes
-                current += char
-            elif char == ',' and not in_quotes:
-                parts.append(current.strip())
-                current = ""
-            else:
-                current += char
-        if current:
-            parts.append(current.strip())
+        # Parse header, skipping any blank lines before it
+        header = next(line for _, line in lines if line.strip())
+        header_parts = split_lbr_line(header)
+        library_name = header_parts[0].strip().strip('"')
+        sprite_count = int(header_parts[1])
         
-        if len(parts) < 5:
-            print(f"Skipping invalid line {line_num}: too few parts")
-            continue
+        print(f"Library: {library_name}")
+        print(f"Sprite count: {sprite_count}")
+        print()
         
-        try:
-            sprite_idx = int(parts[0])
-            sprite_name = parts[1].strip('"')
-            width = int(parts[2])
-            height = int(parts[3])
-            data_values = parts[4:]
-            
-            # Remove trailing terminator values (usually last 2 values)
-            # Based on analysis, sprites have ~96 data values for 16x24
-            expected_data = (width // 16) * 4 * height
-            if expected_data == 0:
-                expected_data = 4 * height  # minimum 4 per row
+        # Parse each sprite
+        for line_num, line in lines:
+            if not line.strip():
+                continue
             
-            # Trim to expected data length
-            if len(data_values) > expected_data:
-                data_values = data_values[:expected_data]
+            parts = split_lbr_line(line)
             
-            sprites.append({
-                'index': sprite_idx,
-                'name': sprite_name,
-                'width': width,
-                'height': height,
-                'data': data_values
-            })
+            if len(parts) < 5:
+                print(f"Skipping invalid line {line_num}: too few parts")
+                continue
             
-        except (ValueError, IndexError) as e:
-            print(f"Error parsing line {line_num}: {e}")
-            continue
+            try:
+                sprite_idx = int(parts[0])
+                sprite_name = parts[1].strip().strip('"')
+                width = int(parts[2])
+                height = int(parts[3])
+                data_values = parts[4:]
+                
+                # Remove trailing terminator values (usually last 2 values)
+                # Based on analysis, sprites have ~96 data values for 16x24
+                expected_data = (width // 16) * 4 * height
+                if expected_data == 0:
+                    expected_data = 4 * height  # minimum 4 per row
+                
+                # Trim to expected data length and wrap the values to unsigned
+                # 16-bit plane bitmasks; both signed (-1) and unsigned (65535)
+                # spellings of a mask are accepted
+                data_values = np.array(
+                    data_values[:expected_data], dtype=np.int32
+                ).astype(np.uint16)
+                
+                sprites.append({
+                    'index': sprite_idx,
+                    'name': sprite_name,
+                    'width': width,
+                    'height': height,
+                    'data': data_values
+                })
+                
+            except (ValueError, IndexError, OverflowError) as e:
+                print(f"Error parsing line {line_num}: {e}")
+                continue
     
     return library_name, sprites
 
-def main():
-    input_file = '/mnt/user-data/uploads/MINERVGA.LBR'
-    output_dir = '/home/claude/minervga_sprites'
-    output_dir_1x = '/home/claude/minervga_sprites_1x'
-    
-    os.makedirs(output_dir, exist_ok=True)
-    os.makedirs(output_dir_1x, exist_ok=True)
-    
-    library_name, sprites = parse_lbr_file(input_file)
-    
-    print(f"Parsed {len(sprites)} sprites")
-    print()
+def sprite_basename(sprite):
+    """Return the file name stem used for a sprite's outputs, e.g. 02_Clover"""
+    # Clean filename
+    safe_name = sprite['name'].replace('/', '_').replace('\\', '_')
+    return f"{sprite['index']:02d}_{safe_name}"
+
+def process_sprite(sprite, output_dir, output_dir_1x):
+    """
+    Save the 4x and 1x images of one parsed sprite.
     
-    # Process each sprite
-    for sprite in sprites:
-        print(f"Processing sprite {sprite['index']:2d}: {sprite['name']}")
-        
-        # Parse pixel data
-        pixels = parse_sprite_data(
-            sprite['data'], 
-            sprite['width'], 
-            sprite['height']
-        )
-        
-        # Clean filename
-        safe_name = sprite['name'].replace('/', '_').replace('\\', '_')
-        filename = f"{sprite['index']:02d}_{safe_name}.png"
-        
-        # Create and save image (scaled 4x for visibility)
-        img_4x = create_sprite_image(pixels, scale=4)
-        filepath_4x = os.path.join(output_dir, filename)
-        img_4x.save(filepath_4x)
-        
-        # Create and save original 1x size
-        img_1x = create_sprite_image(pixels, scale=1)
-        filepath_1x = os.path.join(output_dir_1x, filename)
-        img_1x.save(filepath_1x)
+    The individual sprites are tiny, so they are saved with the fastest
+    zlib level; the size difference is negligible.
+    """
+    filename = f"{sprite_basename(sprite)}.png"
     
-    print()
-    print(f"Sprites (4x) saved to: {output_dir}")
-    print(f"Sprites (1x) saved to: {output_dir_1x}")
+    # Create and save image (scaled 4x for visibility)
+    img_4x = Image.fromarray(upscale_rgb(sprite['rgb'], 4), 'RGB')
+    filepath_4x = os.path.join(output_dir, filename)
+    img_4x.save(filepath_4x, 'PNG', compress_level=1)
     
-    # Also create sprite sheets with all sprites
+    # Create and save original 1x size
+    img_1x = Image.fromarray(sprite['rgb'], 'RGB')
+    filepath_1x = os.path.join(output_dir_1x, filename)
+    img_1x.save(filepath_1x, 'PNG', compress_level=1)
+
+def save_sprite_sheets(sprites, output_dir, output_dir_1x):
+    """Save 4x and 1x sprite sheets built from each sprite's 1x RGB array"""
     print("Creating sprite sheets...")
     
     sprites_per_row = 10
     
-    # 4x scaled spritesheet
-    sprite_width_4x = 16 * 4
-    sprite_height_4x = 24 * 4
-    padding_4x = 4
-    
     num_rows = (len(sprites) + sprites_per_row - 1) // sprites_per_row
     
-    sheet_width_4x = sprites_per_row * (sprite_width_4x + padding_4x) + padding_4x
-    sheet_height_4x = num_rows * (sprite_height_4x + padding_4x) + padding_4x
-    
-    sheet_4x = Image.new('RGB', (sheet_width_4x, sheet_height_4x), (32, 32, 32))
-    
-    for i, sprite in enumerate(sprites):
-        row = i // sprites_per_row
-        col = i % sprites_per_row
-        
-        x = col * (sprite_width_4x + padding_4x) + padding_4x
-        y = row * (sprite_height_4x + padding_4x) + padding_4x
-        
-        pixels = parse_sprite_data(sprite['data'], sprite['width'], sprite['height'])
-        img = create_sprite_image(pixels, scale=4)
-        
-        sheet_4x.paste(img, (x, y))
-    
-    sheet_path_4x = os.path.join(output_dir, 'spritesheet.png')
-    sheet_4x.save(sheet_path_4x)
-    print(f"Sprite sheet (4x) saved to: {sheet_path_4x}")
-    
     # 1x original size spritesheet
     sprite_width_1x = 16
     sprite_height_1x = 24
@@ -281,7 +227,7 @@ def main():
     sheet_width_1x = sprites_per_row * (sprite_width_1x + padding_1x) + padding_1x
     sheet_height_1x = num_rows * (sprite_height_1x + padding_1x) + padding_1x
     
-    sheet_1x = Image.new('RGB', (sheet_width_1x, sheet_height_1x), (32, 32, 32))
+    sheet_1x = np.full((sheet_height_1x, sheet_width_1x, 3), 32, dtype=np.uint8)
     
     for i, sprite in enumerate(sprites):
         row = i // sprites_per_row
@@ -290,14 +236,93 @@ def main():
         x = col * (sprite_width_1x + padding_1x) + padding_1x
         y = row * (sprite_height_1x + padding_1x) + padding_1x
         
-        pixels = parse_sprite_data(sprite['data'], sprite['width'], sprite['height'])
-        img = create_sprite_image(pixels, scale=1)
+        rgb = sprite['rgb']
         
-        sheet_1x.paste(img, (x, y))
+        # Clip sprites that run past the sheet edge, like Image.paste
+        h = min(rgb.shape[0], sheet_1x.shape[0] - y)
+        w = min(rgb.shape[1], sheet_1x.shape[1] - x)
+        sheet_1x[y:y + h, x:x + w] = rgb[:h, :w]
+    
+    # 4x scaled spritesheet: the padding scales with the sprites (4px), so
+    # this is just the 1x sheet scaled up
+    sheet_4x = upscale_rgb(sheet_1x, 4)
+    
+    sheet_path_4x = os.path.join(output_dir, 'spritesheet.png')
+    Image.fromarray(sheet_4x, 'RGB').save(sheet_path_4x)
+    print(f"Sprite sheet (4x) saved to: {sheet_path_4x}")
     
     sheet_path_1x = os.path.join(output_dir_1x, 'spritesheet.png')
-    sheet_1x.save(sheet_path_1x)
+    Image.fromarray(sheet_1x, 'RGB').save(sheet_path_1x)
     print(f"Sprite sheet (1x) saved to: {sheet_path_1x}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Extract the sprites from a MinerVGA sprite library'
+    )
+    parser.add_argument(
+        '--sheet-only', action='store_true',
+        help='only write the sprite sheets, not the individual sprite PNGs'
+    )
+    parser.add_argument(
+        '--format', choices=['png', 'npz'], default='png',
+        help='write PNG images (default) or a single sprites.npz of the '
+             'raw color indices for other tools'
+    )
+    args = parser.parse_args()
+    if args.sheet_only and args.format != 'png':
+        parser.error('--sheet-only only applies to --format png')
+    
+    input_file = '/mnt/user-data/uploads/MINERVGA.LBR'
+    output_dir = '/home/claude/minervga_sprites'
+    output_dir_1x = '/home/claude/minervga_sprites_1x'
+    
+    os.makedirs(output_dir, exist_ok=True)
+    if args.format == 'png':
+        os.makedirs(output_dir_1x, exist_ok=True)
+    
+    library_name, sprites = parse_lbr_file(input_file)
+    
+    print(f"Parsed {len(sprites)} sprites")
+    print()
+    
+    # Parse pixel data
+    for sprite in sprites:
+        sprite['pixels'] = parse_sprite_data(
+            sprite['data'], 
+            sprite['width'], 
+            sprite['height']
+        )
+        
+        # Look up the colors once for the sprite images and the sheets;
+        # the 4x versions are the 1x ones scaled up
+        if args.format == 'png':
+            sprite['rgb'] = sprite_to_rgb(sprite['pixels'])
+    
+    if args.format == 'png' and not args.sheet_only:
+        # Save each sprite. PNG encoding releases the GIL, so sprites are
+        # saved on a thread pool; map() still yields them in order.
+        save_sprite = partial(
+            process_sprite, output_dir=output_dir, output_dir_1x=output_dir_1x
+        )
+        with ThreadPoolExecutor() as executor:
+            for sprite, _ in zip(sprites, executor.map(save_sprite, sprites)):
+                print(f"Processing sprite {sprite['index']:2d}: {sprite['name']}")
+        
+        print()
+        print(f"Sprites (4x) saved to: {output_dir}")
+        print(f"Sprites (1x) saved to: {output_dir_1x}")
+    
+    if args.format == 'npz':
+        # One compressed archive of each sprite's (height, width) color
+        # indices, keyed by the sprite's file name stem
+        npz_path = os.path.join(output_dir, 'sprites.npz')
+        np.savez_compressed(npz_path, **{
+            sprite_basename(sprite): sprite['pixels'] for sprite in sprites
+        })
+        print(f"Sprite data saved to: {npz_path}")
+    else:
+        # Also create sprite sheets with all sprites
+        save_sprite_sheets(sprites, output_dir, output_dir_1x)
     
     # Save sprite index/documentation
     doc_path = os.path.join(output_dir, 'sprite_index.txt')